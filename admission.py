@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+from typing import Dict, Optional
+import math
+import time
+
+
+MAX_IN_FLIGHT_WRITES = 32
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"retry after {retry_after:.3f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def configure(self, rate: float, capacity: int) -> None:
+        self.refill()
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = min(self.tokens, float(capacity))
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> float:
+        self.refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight_writes: int = MAX_IN_FLIGHT_WRITES):
+        self.max_in_flight_writes = max_in_flight_writes
+        self.in_flight_writes = 0
+        self.buckets: Dict[int, TokenBucket] = {}
+
+    def get_bucket(
+        self,
+        source_id: int,
+        rate_limit: Optional[float],
+        rate_burst: Optional[int]
+    ) -> Optional[TokenBucket]:
+        if not rate_limit or rate_limit <= 0:
+            self.buckets.pop(source_id, None)
+            return None
+        capacity = rate_burst or max(1, math.ceil(rate_limit))
+        bucket = self.buckets.get(source_id)
+        if bucket is None:
+            bucket = self.buckets[source_id] = TokenBucket(rate_limit, capacity)
+        elif bucket.rate != rate_limit or bucket.capacity != capacity:
+            bucket.configure(rate_limit, capacity)
+        return bucket
+
+    @contextmanager
+    def admit(
+        self,
+        source_id: int,
+        rate_limit: Optional[float] = None,
+        rate_burst: Optional[int] = None
+    ):
+        if self.in_flight_writes >= self.max_in_flight_writes:
+            raise AdmissionRejected(1.0)
+        
+        bucket = self.get_bucket(source_id, rate_limit, rate_burst)
+        if bucket is not None:
+            retry_after = bucket.try_acquire()
+            if retry_after > 0:
+                raise AdmissionRejected(retry_after)
+        
+        self.in_flight_writes += 1
+        try:
+            yield
+        finally:
+            self.in_flight_writes -= 1
+
+
+admission = AdmissionController()
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from strategies import STRATEGIES, RoutingEntry
+
+
+async def run_strategy(name: str, operators: int, events: int, seed: int):
+    random.seed(seed)
+    strategy = STRATEGIES[name]
+    strategy.reset()
+    entries = [
+        RoutingEntry(operator_id, random.choice([1.0, 2.0, 5.0]), True, events)
+        for operator_id in range(1, operators + 1)
+    ]
+    loads = {entry.operator_id: 0 for entry in entries}
+    loads_read = 0
+
+    async def get_loads(operator_ids):
+        nonlocal loads_read
+        loads_read += len(operator_ids)
+        return {operator_id: loads[operator_id] for operator_id in operator_ids}
+
+    latencies = []
+    for _ in range(events):
+        started = time.perf_counter()
+        operator_id = await strategy.select(1, entries, get_loads)
+        latencies.append(time.perf_counter() - started)
+        
+        loads[operator_id] += 1
+        strategy.on_load_change(operator_id, loads[operator_id])
+        if random.random() < 0.5:
+            busy = random.choice([operator_id for operator_id, load in loads.items() if load])
+            loads[busy] -= 1
+            strategy.on_load_change(busy, loads[busy])
+    
+    strategy.reset()
+    latencies.sort()
+    weighted = [loads[entry.operator_id] / entry.weight for entry in entries]
+    return {
+        "mean_us": statistics.mean(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+        "loads_read": loads_read / events,
+        "spread": max(weighted) - min(weighted),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение стратегий распределения")
+    parser.add_argument("--operators", type=int, default=200)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    
+    print(f"{'стратегия':<20}{'среднее, мкс':>14}{'p99, мкс':>12}{'нагрузок/выбор':>16}{'разброс':>10}")
+    for name in STRATEGIES:
+        result = asyncio.run(run_strategy(name, args.operators, args.events, args.seed))
+        print(
+            f"{name:<20}{result['mean_us']:>14.1f}{result['p99_us']:>12.1f}"
+            f"{result['loads_read']:>16.1f}{result['spread']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
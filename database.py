@@ -1,4 +1,7 @@
+import re
+
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import inspect
 from sqlalchemy.orm import declarative_base
 
 
@@ -11,6 +14,34 @@ AsyncSessionLocal = async_sessionmaker(
 
 Base = declarative_base()
 
+SCHEMA_VERSION = 7
+
+# init_db выполняет create_all до миграций, поэтому таблица может уже иметь
+# итоговую схему. Каждая миграция должна быть безопасна при повторном запуске:
+# ADD COLUMN пропускается для существующих колонок, остальное — IF NOT EXISTS
+# или идемпотентные операции.
+MIGRATIONS = {
+    3: [
+        "ALTER TABLE sources ADD COLUMN rate_limit FLOAT",
+        "ALTER TABLE sources ADD COLUMN rate_burst INTEGER",
+    ],
+    4: [
+        "INSERT INTO leads_fts(leads_fts) VALUES ('rebuild')",
+        "INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')",
+    ],
+    5: [
+        "ALTER TABLE sources ADD COLUMN distribution_strategy VARCHAR DEFAULT 'weighted_random' NOT NULL",
+    ],
+    6: [
+        "CREATE INDEX IF NOT EXISTS ix_contacts_lead_id_created_at ON contacts (lead_id, created_at)",
+    ],
+    7: [
+        "ALTER TABLE idempotency_keys ADD COLUMN request_hash VARCHAR",
+    ],
+}
+
+ADD_COLUMN = re.compile(r"ALTER TABLE (\w+) ADD COLUMN (\w+)", re.IGNORECASE)
+
 
 async def get_db():
     async with AsyncSessionLocal() as session:
@@ -20,7 +51,33 @@ async def get_db():
             await session.close()
 
 
+async def get_schema_version(conn) -> int:
+    result = await conn.exec_driver_sql("PRAGMA user_version")
+    return result.scalar() or 0
+
+
+async def column_exists(conn, table: str, column: str) -> bool:
+    result = await conn.exec_driver_sql(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in result)
+
+
+async def apply_migration(conn, statement: str):
+    match = ADD_COLUMN.match(statement)
+    if match and await column_exists(conn, *match.groups()):
+        return
+    await conn.exec_driver_sql(statement)
+
+
 async def init_db():
     async with engine.begin() as conn:
+        version = await get_schema_version(conn)
+        if version >= SCHEMA_VERSION:
+            return
+        existing = await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table("sources"))
         await conn.run_sync(Base.metadata.create_all)
+        if existing:
+            for target in range(version + 1, SCHEMA_VERSION + 1):
+                for statement in MIGRATIONS.get(target, []):
+                    await apply_migration(conn, statement)
+        await conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
@@ -0,0 +1,265 @@
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy import select, update, delete, func, bindparam
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import asyncio
+import hashlib
+import re
+
+from models import Lead, Contact
+
+
+BATCH_SIZE = 5000
+CHUNK_SIZE = 1000
+REPORT_SAMPLE_SIZE = 20
+
+leads_table = Lead.__table__
+contacts_table = Contact.__table__
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    if not phone:
+        return None
+    digits = re.sub(r"\D", "", phone)
+    if len(digits) == 11 and digits.startswith("8"):
+        digits = "7" + digits[1:]
+    elif len(digits) == 10:
+        digits = "7" + digits
+    return digits or None
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    if not email:
+        return None
+    return email.strip().lower() or None
+
+
+def normalize_external_id(external_id: Optional[str]) -> Optional[str]:
+    if not external_id:
+        return None
+    return external_id.strip() or None
+
+
+def _identity_hash(kind: str, value: str) -> int:
+    digest = hashlib.blake2b(f"{kind}:{value}".encode(), digest_size=10).digest()
+    return int.from_bytes(digest, "big")
+
+
+def identity_keys(
+    external_id: Optional[str],
+    phone: Optional[str],
+    email: Optional[str]
+) -> Tuple[Optional[int], List[int]]:
+    external_id = normalize_external_id(external_id)
+    external_key = _identity_hash("external_id", external_id) if external_id else None
+    keys = [] if external_key is None else [external_key]
+    for kind, value in (
+        ("phone", normalize_phone(phone)),
+        ("email", normalize_email(email)),
+    ):
+        if value:
+            keys.append(_identity_hash(kind, value))
+    return external_key, keys
+
+
+class LeadGroups:
+    def __init__(self):
+        self.scanned = 0
+        self.conflict_count = 0
+        self.conflicts: List[Tuple[int, int]] = []
+        self._owners: Dict[int, int] = {}
+        self._parents: Dict[int, int] = {}
+        self._external: Dict[int, int] = {}
+
+    def find(self, lead_id: int) -> int:
+        root = lead_id
+        while self._parents.get(root, root) != root:
+            root = self._parents[root]
+        while lead_id != root:
+            self._parents[lead_id], lead_id = root, self._parents[lead_id]
+        return root
+
+    def union(self, first: int, second: int) -> bool:
+        first_root, second_root = self.find(first), self.find(second)
+        if first_root == second_root:
+            return True
+        
+        first_external = self._external.get(first_root)
+        second_external = self._external.get(second_root)
+        if first_external is not None and second_external is not None and first_external != second_external:
+            self.conflict_count += 1
+            if len(self.conflicts) < REPORT_SAMPLE_SIZE:
+                self.conflicts.append((first, second))
+            return False
+        
+        if second_root < first_root:
+            first_root, second_root = second_root, first_root
+        self._parents[second_root] = first_root
+        self._parents.setdefault(first_root, first_root)
+        external = first_external if first_external is not None else second_external
+        self._external.pop(second_root, None)
+        if external is not None:
+            self._external[first_root] = external
+        return True
+
+    def add(self, lead_id: int, external_key: Optional[int], keys: Iterable[int]) -> None:
+        self.scanned += 1
+        if external_key is not None:
+            self._external[lead_id] = external_key
+        for key in keys:
+            owner = self._owners.setdefault(key, lead_id)
+            if owner != lead_id:
+                self.union(owner, lead_id)
+
+    def duplicates(self) -> Dict[int, int]:
+        duplicates = {}
+        for lead_id in list(self._parents):
+            root = self.find(lead_id)
+            if root != lead_id:
+                duplicates[lead_id] = root
+        return duplicates
+
+
+async def scan_leads(conn: AsyncConnection, batch_size: int = BATCH_SIZE) -> LeadGroups:
+    groups = LeadGroups()
+    result = await conn.stream(
+        select(leads_table.c.id, leads_table.c.external_id, leads_table.c.phone, leads_table.c.email)
+        .order_by(leads_table.c.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions(batch_size):
+        for lead_id, external_id, phone, email in rows:
+            groups.add(lead_id, *identity_keys(external_id, phone, email))
+    return groups
+
+
+def chunked(items: List[Tuple[int, int]], size: int) -> Iterator[List[Tuple[int, int]]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def count_contacts(conn: AsyncConnection, lead_ids: List[int]) -> int:
+    result = await conn.execute(
+        select(func.count(contacts_table.c.id)).where(contacts_table.c.lead_id.in_(lead_ids))
+    )
+    return result.scalar() or 0
+
+
+async def merge_chunk(conn: AsyncConnection, pairs: List[Tuple[int, int]]) -> int:
+    duplicate_ids = [duplicate_id for duplicate_id, _ in pairs]
+    survivors = dict(pairs)
+    
+    result = await conn.execute(
+        select(
+            leads_table.c.id,
+            leads_table.c.external_id,
+            leads_table.c.phone,
+            leads_table.c.email,
+            leads_table.c.name
+        ).where(leads_table.c.id.in_(duplicate_ids))
+    )
+    duplicate_rows = result.all()
+    
+    moved = await conn.execute(
+        update(contacts_table)
+        .where(contacts_table.c.lead_id == bindparam("duplicate_id"))
+        .values(lead_id=bindparam("survivor_id")),
+        [{"duplicate_id": duplicate_id, "survivor_id": survivor_id} for duplicate_id, survivor_id in pairs]
+    )
+    
+    await conn.execute(delete(leads_table).where(leads_table.c.id.in_(duplicate_ids)))
+    
+    if duplicate_rows:
+        await conn.execute(
+            update(leads_table)
+            .where(leads_table.c.id == bindparam("survivor_id"))
+            .values(
+                external_id=func.coalesce(leads_table.c.external_id, bindparam("duplicate_external_id")),
+                phone=func.coalesce(leads_table.c.phone, bindparam("duplicate_phone")),
+                email=func.coalesce(leads_table.c.email, bindparam("duplicate_email")),
+                name=func.coalesce(leads_table.c.name, bindparam("duplicate_name"))
+            ),
+            [
+                {
+                    "survivor_id": survivors[row.id],
+                    "duplicate_external_id": row.external_id,
+                    "duplicate_phone": row.phone,
+                    "duplicate_email": row.email,
+                    "duplicate_name": row.name
+                }
+                for row in duplicate_rows
+            ]
+        )
+    return moved.rowcount
+
+
+async def deduplicate_leads(
+    engine,
+    dry_run: bool = True,
+    chunk_size: int = CHUNK_SIZE
+) -> Dict[str, object]:
+    async with engine.connect() as conn:
+        groups = await scan_leads(conn)
+        duplicates = groups.duplicates()
+        pairs = sorted(duplicates.items())
+        
+        contacts_to_move = 0
+        if dry_run:
+            for chunk in chunked(pairs, chunk_size):
+                contacts_to_move += await count_contacts(conn, [duplicate_id for duplicate_id, _ in chunk])
+    
+    if not dry_run:
+        for chunk in chunked(pairs, chunk_size):
+            async with engine.begin() as conn:
+                contacts_to_move += await merge_chunk(conn, chunk)
+    
+    sample: Dict[int, List[int]] = {}
+    for duplicate_id, survivor_id in pairs:
+        if survivor_id not in sample and len(sample) >= REPORT_SAMPLE_SIZE:
+            continue
+        sample.setdefault(survivor_id, []).append(duplicate_id)
+    
+    return {
+        "dry_run": dry_run,
+        "leads_scanned": groups.scanned,
+        "groups": len(set(duplicates.values())),
+        "duplicate_leads": len(duplicates),
+        "contacts_moved": contacts_to_move,
+        "sample": sample,
+        "external_id_conflicts": groups.conflict_count,
+        "conflict_sample": groups.conflicts,
+    }
+
+
+def format_report(report: Dict[str, object]) -> str:
+    lines = [
+        "Пробный запуск (изменения не применены)" if report["dry_run"] else "Объединение выполнено",
+        f"Просмотрено лидов: {report['leads_scanned']}",
+        f"Групп дубликатов: {report['groups']}",
+        f"Лидов-дубликатов: {report['duplicate_leads']}",
+        f"Обращений {'к переносу' if report['dry_run'] else 'перенесено'}: {report['contacts_moved']}",
+    ]
+    for survivor_id, duplicate_ids in report["sample"].items():
+        lines.append(f"  лид {survivor_id} <- {', '.join(str(lead_id) for lead_id in duplicate_ids)}")
+    lines.append(f"Не объединены из-за разных external_id: {report['external_id_conflicts']}")
+    for first_id, second_id in report["conflict_sample"]:
+        lines.append(f"  лид {first_id} и лид {second_id}: общий телефон или email, но разные external_id")
+    return "\n".join(lines)
+
+
+async def main():
+    from database import engine
+    
+    parser = argparse.ArgumentParser(description="Поиск и объединение дубликатов лидов")
+    parser.add_argument("--apply", action="store_true", help="применить объединение (по умолчанию - пробный запуск)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    
+    engine.echo = False
+    report = await deduplicate_leads(engine, dry_run=not args.apply, chunk_size=args.chunk_size)
+    print(format_report(report))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,9 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
-from typing import Optional, List
-import random
-from models import Operator, SourceOperatorWeight, Contact, Lead
+from sqlalchemy import select, insert, func, or_, case
+from typing import Optional, List, Dict, NamedTuple
+import time
+from models import Operator, Source, SourceOperatorWeight, Contact, Lead
+from strategies import RoutingEntry, STRATEGIES, DEFAULT_STRATEGY
 
 
 async def get_operator_load(session: AsyncSession, operator_id: int) -> int:
@@ -15,94 +15,251 @@ async def get_operator_load(session: AsyncSession, operator_id: int) -> int:
     return result.scalar() or 0
 
 
-async def select_operator(
-    session: AsyncSession, 
+class SourceRouting(NamedTuple):
+    strategy: str
+    entries: List[RoutingEntry]
+
+
+LOAD_CACHE_TTL = 5.0
+
+_routing_cache: Dict[int, SourceRouting] = {}
+_routing_generation = 0
+_operator_loads: Dict[int, int] = {}
+_loads_fetched_at: Dict[int, float] = {}
+_load_versions: Dict[int, int] = {}
+_pending_loads: Dict[int, int] = {}
+
+
+def invalidate_routing(source_id: Optional[int] = None) -> None:
+    global _routing_generation
+    _routing_generation += 1
+    if source_id is None:
+        _routing_cache.clear()
+        _operator_loads.clear()
+        _loads_fetched_at.clear()
+    else:
+        _routing_cache.pop(source_id, None)
+    for strategy in STRATEGIES.values():
+        strategy.reset(source_id)
+
+
+def _routing_query():
+    return (
+        select(
+            Source.id.label("source_id"),
+            Source.distribution_strategy,
+            SourceOperatorWeight.operator_id,
+            SourceOperatorWeight.weight,
+            Operator.is_active,
+            Operator.max_load
+        )
+        .outerjoin(SourceOperatorWeight, SourceOperatorWeight.source_id == Source.id)
+        .outerjoin(Operator, SourceOperatorWeight.operator_id == Operator.id)
+        .order_by(Source.id, SourceOperatorWeight.operator_id)
+    )
+
+
+def _build_routing(rows) -> Dict[int, SourceRouting]:
+    routing: Dict[int, SourceRouting] = {}
+    for row in rows:
+        source_routing = routing.get(row.source_id)
+        if source_routing is None:
+            source_routing = routing[row.source_id] = SourceRouting(
+                row.distribution_strategy or DEFAULT_STRATEGY, []
+            )
+        if row.operator_id is not None and row.max_load is not None:
+            source_routing.entries.append(
+                RoutingEntry(row.operator_id, row.weight, row.is_active, row.max_load)
+            )
+    return routing
+
+
+async def get_source_routing(
+    session: AsyncSession,
     source_id: int
-) -> Optional[Operator]:
+) -> SourceRouting:
+    cached = _routing_cache.get(source_id)
+    if cached is not None:
+        return cached
+    
+    generation = _routing_generation
     result = await session.execute(
-        select(SourceOperatorWeight)
-        .where(SourceOperatorWeight.source_id == source_id)
-        .options(selectinload(SourceOperatorWeight.operator))
+        _routing_query().where(Source.id == source_id)
     )
-    weights = result.scalars().all()
-    
-    if not weights:
-        return None
-    
-    
-    available_operators = []
-    available_weights = []
+    routing = _build_routing(result.all()).get(source_id, SourceRouting(DEFAULT_STRATEGY, []))
+    if generation == _routing_generation:
+        _routing_cache[source_id] = routing
+    return routing
+
+
+async def get_operator_loads(
+    session: AsyncSession,
+    operator_ids: List[int]
+) -> Dict[int, int]:
+    if not operator_ids:
+        return {}
+    result = await session.execute(
+        select(Contact.operator_id, func.count(Contact.id))
+        .where(Contact.operator_id.in_(operator_ids))
+        .where(Contact.status == "active")
+        .group_by(Contact.operator_id)
+    )
+    return {operator_id: count for operator_id, count in result.all()}
+
+
+def _effective_load(operator_id: int, committed: int) -> int:
+    return committed + _pending_loads.get(operator_id, 0)
+
+
+def _notify_load(operator_id: int) -> None:
+    if operator_id not in _operator_loads:
+        return
+    load = _effective_load(operator_id, _operator_loads[operator_id])
+    for strategy in STRATEGIES.values():
+        strategy.on_load_change(operator_id, load)
+
+
+async def get_cached_operator_loads(
+    session: AsyncSession,
+    operator_ids: List[int]
+) -> Dict[int, int]:
+    now = time.monotonic()
+    loads = {}
+    missing = []
+    for operator_id in operator_ids:
+        if operator_id in _operator_loads and now - _loads_fetched_at[operator_id] < LOAD_CACHE_TTL:
+            loads[operator_id] = _effective_load(operator_id, _operator_loads[operator_id])
+        else:
+            missing.append(operator_id)
+    if not missing:
+        return loads
     
-    for weight_item in weights:
-        operator = weight_item.operator
-        if not operator.is_active:
-            continue
-        
-        current_load = await get_operator_load(session, operator.id)
-        if current_load >= operator.max_load:
+    generation = _routing_generation
+    versions = {operator_id: _load_versions.get(operator_id, 0) for operator_id in missing}
+    loaded = await get_operator_loads(session, missing)
+    fetched_at = time.monotonic()
+    for operator_id in missing:
+        load = loaded.get(operator_id, 0)
+        if generation != _routing_generation or versions[operator_id] != _load_versions.get(operator_id, 0):
+            loads[operator_id] = _effective_load(operator_id, _operator_loads.get(operator_id, load))
             continue
-        
-        available_operators.append(operator)
-        available_weights.append(weight_item.weight)
-    
-    if not available_operators:
-        return None
+        changed = _operator_loads.get(operator_id) != load
+        _operator_loads[operator_id] = load
+        _loads_fetched_at[operator_id] = fetched_at
+        if changed:
+            _notify_load(operator_id)
+        loads[operator_id] = _effective_load(operator_id, load)
+    return loads
+
+
+def record_load_change(operator_id: int, delta: int) -> None:
+    _load_versions[operator_id] = _load_versions.get(operator_id, 0) + 1
+    if operator_id not in _operator_loads:
+        return
+    _operator_loads[operator_id] = max(0, _operator_loads[operator_id] + delta)
+    _notify_load(operator_id)
+
+
+def reserve_load(operator_id: int) -> None:
+    _pending_loads[operator_id] = _pending_loads.get(operator_id, 0) + 1
+    _notify_load(operator_id)
+
+
+def release_load(operator_id: int) -> None:
+    pending = _pending_loads.get(operator_id, 0) - 1
+    if pending > 0:
+        _pending_loads[operator_id] = pending
+    else:
+        _pending_loads.pop(operator_id, None)
+    _notify_load(operator_id)
+
+
+def confirm_load(operator_id: int) -> None:
+    release_load(operator_id)
+    record_load_change(operator_id, 1)
+
+
+async def warm_up(session: AsyncSession) -> None:
+    generation = _routing_generation
+    result = await session.execute(_routing_query())
+    routing = _build_routing(result.all())
+    if generation != _routing_generation:
+        return
+    for source_id, source_routing in routing.items():
+        _routing_cache.setdefault(source_id, source_routing)
     
-  
-    total_weight = sum(available_weights)
-    if total_weight == 0:
-        return random.choice(available_operators)
+    operator_ids = {entry.operator_id for source_routing in routing.values() for entry in source_routing.entries}
+    await get_cached_operator_loads(session, sorted(operator_ids))
+
+
+async def select_operator(
+    session: AsyncSession, 
+    source_id: int
+) -> Optional[Operator]:
+    routing = await get_source_routing(session, source_id)
+    entries = [entry for entry in routing.entries if entry.is_active]
     
-    random_value = random.uniform(0, total_weight)
+    if not entries:
+        return None
     
-    cumulative = 0
-    for i, weight in enumerate(available_weights):
-        cumulative += weight
-        if random_value <= cumulative:
-            return available_operators[i]
+    strategy = STRATEGIES.get(routing.strategy, STRATEGIES[DEFAULT_STRATEGY])
+    operator_id = await strategy.select(
+        source_id,
+        entries,
+        lambda operator_ids: get_cached_operator_loads(session, operator_ids)
+    )
+    if operator_id is None:
+        return None
     
-    return available_operators[-1]
+    reserve_load(operator_id)
+    try:
+        operator = await session.get(Operator, operator_id)
+    except BaseException:
+        release_load(operator_id)
+        raise
+    if operator is None:
+        release_load(operator_id)
+    return operator
 
 
-async def find_or_create_lead(
+async def find_lead(
     session: AsyncSession,
     external_id: Optional[str] = None,
     phone: Optional[str] = None,
-    email: Optional[str] = None,
-    name: Optional[str] = None
-) -> Lead:
+    email: Optional[str] = None
+) -> Optional[Lead]:
+    matches = []
     if external_id:
-        result = await session.execute(
-            select(Lead).where(Lead.external_id == external_id)
-        )
-        lead = result.scalar_one_or_none()
-        if lead:
-            return lead
-    
+        matches.append(Lead.external_id == external_id)
     if phone:
-        result = await session.execute(
-            select(Lead).where(Lead.phone == phone)
-        )
-        lead = result.scalar_one_or_none()
-        if lead:
-            return lead
-    
+        matches.append(Lead.phone == phone)
     if email:
-        result = await session.execute(
-            select(Lead).where(Lead.email == email)
-        )
-        lead = result.scalar_one_or_none()
-        if lead:
-            return lead
+        matches.append(Lead.email == email)
+    if not matches:
+        return None
     
-    new_lead = Lead(
-        external_id=external_id,
-        phone=phone,
-        email=email,
-        name=name
+    result = await session.execute(
+        select(Lead)
+        .where(or_(*matches))
+        .order_by(
+            case(*((match, priority) for priority, match in enumerate(matches)), else_=len(matches)),
+            Lead.id
+        )
+        .limit(1)
     )
-    session.add(new_lead)
-    await session.commit()
-    await session.refresh(new_lead)
-    return new_lead
+    return result.scalar_one_or_none()
+
 
+async def create_lead(
+    session: AsyncSession,
+    external_id: Optional[str] = None,
+    phone: Optional[str] = None,
+    email: Optional[str] = None,
+    name: Optional[str] = None
+) -> Lead:
+    result = await session.scalars(
+        insert(Lead)
+        .values(external_id=external_id, phone=phone, email=email, name=name)
+        .returning(Lead)
+    )
+    return result.one()
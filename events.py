@@ -0,0 +1,84 @@
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Set
+import asyncio
+import uuid
+
+
+HISTORY_SIZE = 100
+QUEUE_SIZE = 100
+
+
+class Event(NamedTuple):
+    seq: int
+    type: str
+    data: Dict[str, Any]
+
+
+class EventHub:
+    def __init__(self, history_size: int = HISTORY_SIZE, queue_size: int = QUEUE_SIZE):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.epoch = uuid.uuid4().hex[:12]
+        self.last_seq = 0
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._history: Dict[int, Deque[Event]] = {}
+        self._evicted: Dict[int, int] = {}
+
+    def subscriber_count(self, operator_id: Optional[int] = None) -> int:
+        if operator_id is not None:
+            return len(self._subscribers.get(operator_id, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def parse_event_id(self, event_id: str) -> Optional[int]:
+        epoch, _, seq = event_id.rpartition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def publish(self, operator_id: int, event_type: str, data: Dict[str, Any]) -> Event:
+        self.last_seq += 1
+        event = Event(self.last_seq, event_type, data)
+        
+        history = self._history.get(operator_id)
+        if history is None:
+            history = self._history[operator_id] = deque(maxlen=self.history_size)
+        if len(history) == history.maxlen:
+            self._evicted[operator_id] = history[0].seq
+        history.append(event)
+        
+        for queue in self._subscribers.get(operator_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+        return event
+
+    def replay(self, operator_id: int, last_event_id: Optional[str]) -> Optional[List[Event]]:
+        if last_event_id is None:
+            return []
+        last_seq = self.parse_event_id(last_event_id)
+        if last_seq is None or last_seq > self.last_seq or last_seq < self._evicted.get(operator_id, 0):
+            return None
+        return [event for event in self._history.get(operator_id, ()) if event.seq > last_seq]
+
+    @contextmanager
+    def subscribe(self, operator_id: int, last_event_id: Optional[str] = None):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(operator_id, set()).add(queue)
+        try:
+            yield self.replay(operator_id, last_event_id), queue
+        finally:
+            queues = self._subscribers.get(operator_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[operator_id]
+
+
+hub = EventHub()
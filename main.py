@@ -1,16 +1,34 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
+import logging
 import uvicorn
 
-from database import init_db
-from routers import operators, sources, contacts, leads, stats
+from database import init_db, AsyncSessionLocal
+from distribution import warm_up
+from routers import operators, sources, contacts, leads, stats, search
+
+
+logger = logging.getLogger(__name__)
+
+
+async def run_warm_up(app: FastAPI):
+    try:
+        async with AsyncSessionLocal() as session:
+            await warm_up(session)
+    except Exception:
+        logger.exception("Прогрев не удался, кэши будут заполняться по мере запросов")
+    app.state.ready = True
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    app.state.ready = False
     await init_db()
+    warm_up_task = asyncio.create_task(run_warm_up(app))
     yield
-    pass
+    warm_up_task.cancel()
 
 
 app = FastAPI(
@@ -25,6 +43,7 @@ app.include_router(sources.router)
 app.include_router(contacts.router)
 app.include_router(leads.router)
 app.include_router(stats.router)
+app.include_router(search.router)
 
 
 @app.get("/")
@@ -36,6 +55,14 @@ async def root():
     }
 
 
+
+@app.get("/ready")
+async def ready():
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True}
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float, DateTime, UniqueConstraint, Index, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -23,6 +23,9 @@ class Source(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, unique=True, index=True)
     description = Column(String, nullable=True)
+    rate_limit = Column(Float, nullable=True)
+    rate_burst = Column(Integer, nullable=True)
+    distribution_strategy = Column(String, default="weighted_random", server_default="weighted_random", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     operator_weights = relationship("SourceOperatorWeight", back_populates="source", cascade="all, delete-orphan")
@@ -69,7 +72,53 @@ class Contact(Base):
     message = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        Index("ix_contacts_lead_id_created_at", "lead_id", "created_at"),
+    )
+    
     lead = relationship("Lead", back_populates="contacts")
     source = relationship("Source", back_populates="contacts")
     operator = relationship("Operator", back_populates="contacts")
 
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=False)
+    request_hash = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+SEARCH_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts USING fts5("
+    "name, phone, email, content='leads', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS leads_fts_insert AFTER INSERT ON leads BEGIN "
+    "INSERT INTO leads_fts(rowid, name, phone, email) VALUES (new.id, new.name, new.phone, new.email); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS leads_fts_delete AFTER DELETE ON leads BEGIN "
+    "INSERT INTO leads_fts(leads_fts, rowid, name, phone, email) "
+    "VALUES ('delete', old.id, old.name, old.phone, old.email); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS leads_fts_update AFTER UPDATE OF name, phone, email ON leads BEGIN "
+    "INSERT INTO leads_fts(leads_fts, rowid, name, phone, email) "
+    "VALUES ('delete', old.id, old.name, old.phone, old.email); "
+    "INSERT INTO leads_fts(rowid, name, phone, email) VALUES (new.id, new.name, new.phone, new.email); "
+    "END",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5("
+    "message, content='contacts', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_insert AFTER INSERT ON contacts BEGIN "
+    "INSERT INTO contacts_fts(rowid, message) VALUES (new.id, new.message); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_delete AFTER DELETE ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, message) VALUES ('delete', old.id, old.message); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS contacts_fts_update AFTER UPDATE OF message ON contacts BEGIN "
+    "INSERT INTO contacts_fts(contacts_fts, rowid, message) VALUES ('delete', old.id, old.message); "
+    "INSERT INTO contacts_fts(rowid, message) VALUES (new.id, new.message); "
+    "END",
+]
+
+for statement in SEARCH_SCHEMA:
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="sqlite"))
@@ -1,67 +1,197 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, insert, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
+import math
 
 from database import get_db
-from models import Contact, Lead, Source, Operator
-from schemas import ContactCreate, ContactResponse, LeadWithContacts
-from distribution import find_or_create_lead, select_operator
+from models import Contact, Lead, Source, Operator, IdempotencyKey
+from schemas import ContactCreate, ContactResponse, LeadResponse, SourceResponse, OperatorResponse
+from distribution import (
+    find_lead,
+    create_lead,
+    select_operator,
+    record_load_change,
+    confirm_load,
+    release_load
+)
+from idempotency import contact_responses, request_hash
+from admission import admission, AdmissionRejected
+from events import hub
 
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
 
-@router.post("/", response_model=ContactResponse, status_code=201)
-async def create_contact(
-    contact: ContactCreate,
-    db: AsyncSession = Depends(get_db)
-):
-    source_result = await db.execute(
-        select(Source).where(Source.id == contact.source_id)
+async def load_contact(db: AsyncSession, contact_id: int) -> Contact:
+    result = await db.execute(
+        select(Contact)
+        .where(Contact.id == contact_id)
+        .options(
+            selectinload(Contact.lead),
+            selectinload(Contact.source),
+            selectinload(Contact.operator)
+        )
     )
-    source = source_result.scalar_one_or_none()
-    if not source:
-        raise HTTPException(status_code=404, detail="Источник не найден")
+    return result.scalar_one()
+
+
+IDEMPOTENCY_CONFLICT = "Ключ идемпотентности уже использован с другим телом запроса"
+
+
+async def replay_idempotent_contact(
+    db: AsyncSession,
+    idempotency_key: str,
+    body_hash: str
+) -> Optional[ContactResponse]:
+    cached = contact_responses.get(idempotency_key)
+    if cached is not None:
+        cached_hash, response = cached
+        if cached_hash != body_hash:
+            raise HTTPException(status_code=422, detail=IDEMPOTENCY_CONFLICT)
+        return response
     
+    result = await db.execute(
+        select(IdempotencyKey.contact_id, IdempotencyKey.request_hash)
+        .where(IdempotencyKey.key == idempotency_key)
+    )
+    stored = result.first()
+    if stored is None:
+        return None
+    if stored.request_hash is not None and stored.request_hash != body_hash:
+        raise HTTPException(status_code=422, detail=IDEMPOTENCY_CONFLICT)
     
-    lead = await find_or_create_lead(
+    response = ContactResponse.model_validate(await load_contact(db, stored.contact_id))
+    contact_responses.set(idempotency_key, (body_hash, response))
+    return response
+
+
+async def write_contact(
+    db: AsyncSession,
+    source: Source,
+    contact: ContactCreate,
+    idempotency_key: Optional[str],
+    body_hash: Optional[str]
+) -> ContactResponse:
+    lead = await find_lead(
         db,
         external_id=contact.lead_external_id,
         phone=contact.lead_phone,
-        email=contact.lead_email,
-        name=contact.lead_name
+        email=contact.lead_email
     )
     
     
-    operator = await select_operator(db, contact.source_id)
+    operator = await select_operator(db, source.id)
+    operator_id = operator.id if operator else None
     
     
-    new_contact = Contact(
+    committed = False
+    try:
+        if lead is None:
+            lead = await create_lead(
+                db,
+                external_id=contact.lead_external_id,
+                phone=contact.lead_phone,
+                email=contact.lead_email,
+                name=contact.lead_name
+            )
+        
+        result = await db.execute(
+            insert(Contact)
+            .values(
+                lead_id=lead.id,
+                source_id=source.id,
+                operator_id=operator_id,
+                message=contact.message,
+                status="active"
+            )
+            .returning(Contact.id, Contact.created_at)
+        )
+        new_contact = result.one()
+        
+        if idempotency_key:
+            await db.execute(
+                insert(IdempotencyKey).values(
+                    key=idempotency_key,
+                    contact_id=new_contact.id,
+                    request_hash=body_hash
+                )
+            )
+        await db.commit()
+        committed = True
+    except IntegrityError:
+        await db.rollback()
+        if not idempotency_key:
+            raise
+        replayed = await replay_idempotent_contact(db, idempotency_key, body_hash)
+        if replayed is None:
+            raise
+        return replayed
+    finally:
+        if operator_id is not None:
+            if committed:
+                confirm_load(operator_id)
+            else:
+                release_load(operator_id)
+    
+    
+    response = ContactResponse(
+        id=new_contact.id,
         lead_id=lead.id,
-        source_id=contact.source_id,
-        operator_id=operator.id if operator else None,
+        source_id=source.id,
+        operator_id=operator_id,
+        status="active",
         message=contact.message,
-        status="active"
+        created_at=new_contact.created_at,
+        lead=LeadResponse.model_validate(lead),
+        source=SourceResponse.model_validate(source),
+        operator=OperatorResponse.model_validate(operator) if operator else None
     )
-    db.add(new_contact)
-    await db.commit()
-    await db.refresh(new_contact)
     
+    if operator_id is not None:
+        hub.publish(operator_id, "contact_assigned", {
+            "contact_id": response.id,
+            "lead_id": response.lead_id,
+            "source_id": response.source_id,
+            "status": response.status
+        })
     
-    result = await db.execute(
-        select(Contact)
-        .where(Contact.id == new_contact.id)
-        .options(
-            selectinload(Contact.lead),
-            selectinload(Contact.source),
-            selectinload(Contact.operator)
-        )
+    if idempotency_key:
+        contact_responses.set(idempotency_key, (body_hash, response))
+    return response
+
+
+@router.post("/", response_model=ContactResponse, status_code=201)
+async def create_contact(
+    contact: ContactCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_db)
+):
+    body_hash = None
+    if idempotency_key:
+        body_hash = request_hash(contact.model_dump_json())
+        replayed = await replay_idempotent_contact(db, idempotency_key, body_hash)
+        if replayed is not None:
+            return replayed
+    
+    source_result = await db.execute(
+        select(Source).where(Source.id == contact.source_id)
     )
-    contact_with_relations = result.scalar_one()
+    source = source_result.scalar_one_or_none()
+    if not source:
+        raise HTTPException(status_code=404, detail="Источник не найден")
     
-    return contact_with_relations
+    try:
+        with admission.admit(source.id, source.rate_limit, source.rate_burst):
+            return await write_contact(db, source, contact, idempotency_key, body_hash)
+    except AdmissionRejected as exc:
+        raise HTTPException(
+            status_code=429,
+            detail="Превышен лимит обращений",
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+        )
 
 
 @router.get("/", response_model=List[ContactResponse])
@@ -128,9 +258,20 @@ async def update_contact_status(
     if not contact:
         raise HTTPException(status_code=404, detail="Обращение не найдено")
     
+    previous_status = contact.status
     contact.status = status
     await db.commit()
     
+    if contact.operator_id is not None:
+        if previous_status == "active" and status != "active":
+            record_load_change(contact.operator_id, -1)
+        elif previous_status != "active" and status == "active":
+            record_load_change(contact.operator_id, 1)
+        hub.publish(contact.operator_id, "contact_status", {
+            "contact_id": contact.id,
+            "status": contact.status
+        })
+    
     
     result = await db.execute(
         select(Contact)
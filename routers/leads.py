@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func, tuple_
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Optional
 
 from database import get_db
-from models import Lead, Contact
-from schemas import LeadResponse, LeadWithContacts
+from models import Lead, Contact, Source, Operator
+from schemas import (
+    LeadResponse,
+    LeadSummary,
+    LeadSourceCount,
+    LeadLastOperator,
+    LeadContactsPage
+)
 
 
 router = APIRouter(prefix="/leads", tags=["leads"])
@@ -25,20 +31,117 @@ async def list_leads(
     return leads
 
 
-@router.get("/{lead_id}", response_model=LeadWithContacts)
-async def get_lead_with_contacts(
+@router.get("/{lead_id}", response_model=LeadSummary)
+async def get_lead_summary(
     lead_id: int,
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
-        select(Lead)
-        .where(Lead.id == lead_id)
-        .options(selectinload(Lead.contacts).selectinload(Contact.source))
-        .options(selectinload(Lead.contacts).selectinload(Contact.operator))
+        select(Lead).where(Lead.id == lead_id)
     )
     lead = result.scalar_one_or_none()
     if not lead:
         raise HTTPException(status_code=404, detail="Лид не найден")
     
-    return LeadWithContacts(lead=lead, contacts=lead.contacts)
+    counts_result = await db.execute(
+        select(
+            Contact.source_id,
+            Source.name,
+            Contact.status,
+            func.count(Contact.id).label("count")
+        )
+        .join(Source, Contact.source_id == Source.id, isouter=True)
+        .where(Contact.lead_id == lead_id)
+        .group_by(Contact.source_id, Source.name, Contact.status)
+    )
+    
+    total_contacts = 0
+    by_status = {}
+    by_source = {}
+    for row in counts_result.all():
+        total_contacts += row.count
+        by_status[row.status] = by_status.get(row.status, 0) + row.count
+        source_count = by_source.get(row.source_id)
+        if source_count is None:
+            source_count = by_source[row.source_id] = LeadSourceCount(
+                source_id=row.source_id,
+                source_name=row.name,
+                count=0
+            )
+        source_count.count += row.count
+    
+    last_result = await db.execute(
+        select(Contact.id, Contact.operator_id, Contact.created_at, Operator.name)
+        .join(Operator, Contact.operator_id == Operator.id, isouter=True)
+        .where(Contact.lead_id == lead_id)
+        .where(Contact.operator_id.is_not(None))
+        .order_by(Contact.created_at.desc(), Contact.id.desc())
+        .limit(1)
+    )
+    last = last_result.first()
+    last_operator = None
+    if last:
+        last_operator = LeadLastOperator(
+            operator_id=last.operator_id,
+            operator_name=last.name,
+            contact_id=last.id,
+            contacted_at=last.created_at
+        )
+    
+    return LeadSummary(
+        lead=lead,
+        total_contacts=total_contacts,
+        contacts_by_status=by_status,
+        contacts_by_source=list(by_source.values()),
+        last_operator=last_operator
+    )
 
+
+@router.get("/{lead_id}/contacts", response_model=LeadContactsPage)
+async def list_lead_contacts(
+    lead_id: int,
+    before_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    query = (
+        select(Contact)
+        .where(Contact.lead_id == lead_id)
+        .order_by(Contact.created_at.desc(), Contact.id.desc())
+        .limit(limit + 1)
+        .options(
+            selectinload(Contact.source),
+            selectinload(Contact.operator)
+        )
+    )
+    if before_id is not None:
+        anchor_result = await db.execute(
+            select(Contact.lead_id).where(Contact.id == before_id)
+        )
+        if anchor_result.scalar_one_or_none() != lead_id:
+            raise HTTPException(status_code=400, detail="Некорректный before_id")
+        anchor_created_at = (
+            select(Contact.created_at)
+            .where(Contact.id == before_id)
+            .scalar_subquery()
+        )
+        query = query.where(
+            tuple_(Contact.created_at, Contact.id) < tuple_(anchor_created_at, before_id)
+        )
+    
+    result = await db.execute(query)
+    contacts = result.scalars().all()
+    
+    if not contacts and before_id is None:
+        lead_result = await db.execute(
+            select(Lead.id).where(Lead.id == lead_id)
+        )
+        if lead_result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Лид не найден")
+    
+    next_before_id = None
+    if len(contacts) > limit:
+        contacts = contacts[:limit]
+        next_before_id = contacts[-1].id
+    
+    return LeadContactsPage(items=contacts, next_before_id=next_before_id)
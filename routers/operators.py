@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Optional
+import asyncio
+import json
 
 from database import get_db
+from distribution import invalidate_routing
+from events import hub, Event
 from models import Operator
 from schemas import (
     OperatorCreate,
@@ -16,6 +21,31 @@ from schemas import (
 
 router = APIRouter(prefix="/operators", tags=["operators"])
 
+KEEPALIVE_INTERVAL = 15
+
+
+def format_event(event: Event) -> str:
+    return f"id: {hub.event_id(event.seq)}\nevent: {event.type}\ndata: {json.dumps(event.data)}\n\n"
+
+
+async def operator_event_stream(operator_id: int, last_event_id: Optional[str]):
+    with hub.subscribe(operator_id, last_event_id) as (backlog, queue):
+        if backlog is None:
+            yield f"id: {hub.event_id(hub.last_seq)}\nevent: reset\ndata: {{}}\n\n"
+        else:
+            for event in backlog:
+                yield format_event(event)
+        
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            yield format_event(event)
+
 
 @router.post("/", response_model=OperatorResponse, status_code=201)
 async def create_operator(
@@ -68,6 +98,7 @@ async def update_operator(
         setattr(operator, field, value)
     
     await db.commit()
+    invalidate_routing()
     await db.refresh(operator)
     return operator
 
@@ -86,6 +117,7 @@ async def delete_operator(
     
     await db.delete(operator)
     await db.commit()
+    invalidate_routing()
     return None
 
 
@@ -114,3 +146,27 @@ async def get_operator_stats(
         utilization_percent=round(utilization, 2)
     )
 
+
+
+@router.get("/{operator_id}/events")
+async def stream_operator_events(
+    operator_id: int,
+    last_event_id: Optional[str] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(
+        select(Operator.id).where(Operator.id == operator_id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Оператор не найден")
+    await db.close()
+    
+    if last_event_id_header is not None:
+        last_event_id = last_event_id_header
+    
+    return StreamingResponse(
+        operator_event_stream(operator_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+
+from database import get_db
+from models import Lead, Contact
+from schemas import SearchResults
+from search import leads_fts, contacts_fts, build_lead_match, build_contact_match
+
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=SearchResults)
+async def search(
+    q: str = Query(..., min_length=1),
+    scope: str = Query("all", pattern="^(all|leads|contacts)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    leads = []
+    contacts = []
+    
+    lead_match = build_lead_match(q)
+    if scope in ("all", "leads") and lead_match:
+        result = await db.execute(
+            select(Lead)
+            .join(leads_fts, leads_fts.c.rowid == Lead.id)
+            .where(text("leads_fts MATCH :lead_match"))
+            .order_by(leads_fts.c.rank)
+            .offset(skip)
+            .limit(limit),
+            {"lead_match": lead_match}
+        )
+        leads = result.scalars().all()
+    
+    contact_match = build_contact_match(q)
+    if scope in ("all", "contacts") and contact_match:
+        result = await db.execute(
+            select(Contact)
+            .join(contacts_fts, contacts_fts.c.rowid == Contact.id)
+            .where(text("contacts_fts MATCH :contact_match"))
+            .order_by(contacts_fts.c.rank)
+            .offset(skip)
+            .limit(limit),
+            {"contact_match": contact_match}
+        )
+        contacts = result.scalars().all()
+    
+    return SearchResults(query=q, leads=leads, contacts=contacts)
@@ -1,18 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, delete
 from sqlalchemy.orm import selectinload
 from typing import List
 
 from database import get_db
+from distribution import invalidate_routing
 from models import Source, SourceOperatorWeight, Operator
 from schemas import (
     SourceCreate,
+    SourceUpdate,
     SourceResponse,
     SourceConfigResponse,
     SourceOperatorWeightCreate,
     SourceOperatorWeightUpdate,
-    SourceOperatorWeightResponse
+    SourceOperatorWeightResponse,
+    SourceOperatorWeightsReplace
 )
 
 
@@ -54,6 +57,30 @@ async def get_source(
     return source
 
 
+@router.patch("/{source_id}", response_model=SourceResponse)
+async def update_source(
+    source_id: int,
+    source_update: SourceUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(
+        select(Source).where(Source.id == source_id)
+    )
+    source = result.scalar_one_or_none()
+    if not source:
+        raise HTTPException(status_code=404, detail="Источник не найден")
+    
+    update_data = source_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(source, field, value)
+    
+    await db.commit()
+    await db.refresh(source)
+    if "distribution_strategy" in update_data:
+        invalidate_routing(source_id)
+    return source
+
+
 @router.post("/{source_id}/operators", response_model=SourceOperatorWeightResponse, status_code=201)
 async def add_operator_to_source(
     source_id: int,
@@ -90,10 +117,75 @@ async def add_operator_to_source(
     )
     db.add(new_weight)
     await db.commit()
+    invalidate_routing(source_id)
     await db.refresh(new_weight)
     return new_weight
 
 
+@router.put("/{source_id}/operators", response_model=List[SourceOperatorWeightResponse])
+async def replace_source_operators(
+    source_id: int,
+    weights_data: SourceOperatorWeightsReplace,
+    db: AsyncSession = Depends(get_db)
+):
+    new_weights = {item.operator_id: item.weight for item in weights_data.operators}
+    if len(new_weights) != len(weights_data.operators):
+        raise HTTPException(status_code=400, detail="Оператор указан несколько раз")
+    
+    source_result = await db.execute(
+        select(Source.id).where(Source.id == source_id)
+    )
+    if source_result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Источник не найден")
+    
+    if new_weights:
+        operators_result = await db.execute(
+            select(Operator.id).where(Operator.id.in_(new_weights.keys()))
+        )
+        missing = set(new_weights) - set(operators_result.scalars().all())
+        if missing:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Операторы не найдены: {sorted(missing)}"
+            )
+    
+    existing_result = await db.execute(
+        select(SourceOperatorWeight.id, SourceOperatorWeight.operator_id, SourceOperatorWeight.weight)
+        .where(SourceOperatorWeight.source_id == source_id)
+    )
+    existing = {row.operator_id: row for row in existing_result.all()}
+    
+    to_delete = [row.id for operator_id, row in existing.items() if operator_id not in new_weights]
+    to_insert = [
+        {"source_id": source_id, "operator_id": operator_id, "weight": weight}
+        for operator_id, weight in new_weights.items()
+        if operator_id not in existing
+    ]
+    to_update = [
+        {"id": existing[operator_id].id, "weight": weight}
+        for operator_id, weight in new_weights.items()
+        if operator_id in existing and existing[operator_id].weight != weight
+    ]
+    
+    if to_delete:
+        await db.execute(
+            delete(SourceOperatorWeight).where(SourceOperatorWeight.id.in_(to_delete))
+        )
+    if to_update:
+        await db.execute(update(SourceOperatorWeight), to_update)
+    if to_insert:
+        await db.execute(insert(SourceOperatorWeight), to_insert)
+    await db.commit()
+    invalidate_routing(source_id)
+    
+    result = await db.execute(
+        select(SourceOperatorWeight)
+        .where(SourceOperatorWeight.source_id == source_id)
+        .order_by(SourceOperatorWeight.operator_id)
+    )
+    return result.scalars().all()
+
+
 @router.patch("/{source_id}/operators/{operator_id}", response_model=SourceOperatorWeightResponse)
 async def update_operator_weight(
     source_id: int,
@@ -112,6 +204,7 @@ async def update_operator_weight(
     
     weight.weight = weight_update.weight
     await db.commit()
+    invalidate_routing(source_id)
     await db.refresh(weight)
     return weight
 
@@ -133,5 +226,6 @@ async def remove_operator_from_source(
     
     await db.delete(weight)
     await db.commit()
+    invalidate_routing(source_id)
     return None
 
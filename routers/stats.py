@@ -6,7 +6,8 @@ from typing import List, Dict
 
 from database import get_db
 from models import Source, Contact, Operator
-from schemas import SourceStats
+from schemas import SourceStats, AdmissionStats, SourceBucketState
+from admission import admission
 
 
 router = APIRouter(prefix="/stats", tags=["stats"])
@@ -56,3 +57,22 @@ async def get_source_stats(
         operator_distribution=distribution
     )
 
+
+
+@router.get("/admission", response_model=AdmissionStats)
+async def get_admission_stats():
+    buckets = []
+    for source_id, bucket in sorted(admission.buckets.items()):
+        bucket.refill()
+        buckets.append(SourceBucketState(
+            source_id=source_id,
+            rate_limit=bucket.rate,
+            rate_burst=bucket.capacity,
+            tokens=round(bucket.tokens, 3)
+        ))
+    
+    return AdmissionStats(
+        in_flight_writes=admission.in_flight_writes,
+        max_in_flight_writes=admission.max_in_flight_writes,
+        buckets=buckets
+    )
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Dict, Literal
 from datetime import datetime
 
 
@@ -27,15 +27,29 @@ class OperatorResponse(OperatorBase):
         from_attributes = True
 
 
+DistributionStrategyName = Literal["weighted_random", "least_utilization", "power_of_two"]
+
+
 class SourceBase(BaseModel):
     name: str
     description: Optional[str] = None
+    rate_limit: Optional[float] = Field(None, gt=0)
+    rate_burst: Optional[int] = Field(None, gt=0)
+    distribution_strategy: DistributionStrategyName = "weighted_random"
 
 
 class SourceCreate(SourceBase):
     pass
 
 
+class SourceUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    rate_limit: Optional[float] = Field(None, gt=0)
+    rate_burst: Optional[int] = Field(None, gt=0)
+    distribution_strategy: Optional[DistributionStrategyName] = None
+
+
 class SourceResponse(SourceBase):
     id: int
     created_at: datetime
@@ -65,6 +79,10 @@ class SourceOperatorWeightUpdate(BaseModel):
     weight: float
 
 
+class SourceOperatorWeightsReplace(BaseModel):
+    operators: List[SourceOperatorWeightBase]
+
+
 class SourceConfigResponse(SourceResponse):
     operator_weights: List[SourceOperatorWeightResponse] = []
     
@@ -135,7 +153,75 @@ class SourceStats(BaseModel):
     operator_distribution: List[dict]
 
 
-class LeadWithContacts(BaseModel):
+class SourceBucketState(BaseModel):
+    source_id: int
+    rate_limit: float
+    rate_burst: int
+    tokens: float
+
+
+class AdmissionStats(BaseModel):
+    in_flight_writes: int
+    max_in_flight_writes: int
+    buckets: List[SourceBucketState]
+
+
+class ContactSearchHit(BaseModel):
+    id: int
+    lead_id: int
+    source_id: int
+    operator_id: Optional[int] = None
+    status: str
+    message: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class SearchResults(BaseModel):
+    query: str
+    leads: List[LeadResponse]
+    contacts: List[ContactSearchHit]
+
+
+class LeadSourceCount(BaseModel):
+    source_id: int
+    source_name: Optional[str] = None
+    count: int
+
+
+class LeadLastOperator(BaseModel):
+    operator_id: int
+    operator_name: Optional[str] = None
+    contact_id: int
+    contacted_at: datetime
+
+
+class LeadSummary(BaseModel):
     lead: LeadResponse
-    contacts: List[ContactResponse]
+    total_contacts: int
+    contacts_by_status: Dict[str, int]
+    contacts_by_source: List[LeadSourceCount]
+    last_operator: Optional[LeadLastOperator] = None
+
+
+class LeadContactResponse(BaseModel):
+    id: int
+    source_id: int
+    operator_id: Optional[int] = None
+    status: str
+    message: Optional[str] = None
+    created_at: datetime
+    
+    source: SourceResponse
+    operator: Optional[OperatorResponse] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class LeadContactsPage(BaseModel):
+    items: List[LeadContactResponse]
+    next_before_id: Optional[int] = None
 
@@ -0,0 +1,50 @@
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import table, column
+from typing import Optional
+import asyncio
+import re
+
+
+leads_fts = table("leads_fts", column("rowid"), column("rank"))
+contacts_fts = table("contacts_fts", column("rowid"), column("rank"))
+
+TRIGRAM_MIN_LENGTH = 3
+
+
+def _terms(query: str):
+    return [term for term in re.split(r"\s+", query.replace('"', " ")) if term]
+
+
+def build_lead_match(query: str) -> Optional[str]:
+    terms = [term for term in _terms(query) if len(term) >= TRIGRAM_MIN_LENGTH]
+    if not terms:
+        return None
+    return " AND ".join(f'"{term}"' for term in terms)
+
+
+def build_contact_match(query: str) -> Optional[str]:
+    terms = _terms(query)
+    if not terms:
+        return None
+    return " AND ".join(f'"{term}"*' for term in terms)
+
+
+async def rebuild_search_index(conn: AsyncConnection) -> None:
+    await conn.exec_driver_sql("INSERT INTO leads_fts(leads_fts) VALUES ('rebuild')")
+    await conn.exec_driver_sql("INSERT INTO contacts_fts(contacts_fts) VALUES ('rebuild')")
+    await conn.exec_driver_sql("INSERT INTO leads_fts(leads_fts) VALUES ('optimize')")
+    await conn.exec_driver_sql("INSERT INTO contacts_fts(contacts_fts) VALUES ('optimize')")
+
+
+async def main():
+    from database import engine, init_db
+    import models
+    
+    await init_db()
+    async with engine.begin() as conn:
+        await rebuild_search_index(conn)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
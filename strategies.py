@@ -0,0 +1,232 @@
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+import random
+
+
+class RoutingEntry(NamedTuple):
+    operator_id: int
+    weight: float
+    is_active: bool
+    max_load: int
+
+
+LoadFetcher = Callable[[List[int]], Awaitable[Dict[int, int]]]
+
+
+def weighted_pick(entries: List[RoutingEntry]) -> Optional[RoutingEntry]:
+    if not entries:
+        return None
+    
+    total_weight = sum(entry.weight for entry in entries)
+    if total_weight == 0:
+        return random.choice(entries)
+    
+    random_value = random.uniform(0, total_weight)
+    
+    cumulative = 0
+    for entry in entries:
+        cumulative += entry.weight
+        if random_value <= cumulative:
+            return entry
+    
+    return entries[-1]
+
+
+def utilization_priority(entry: RoutingEntry, load: int) -> Tuple[float, int, int]:
+    if entry.weight > 0 and entry.max_load > 0:
+        score = (load + 1) / (entry.max_load * entry.weight)
+    else:
+        score = float("inf")
+    return (score, load, entry.operator_id)
+
+
+class IndexedHeap:
+    def __init__(self):
+        self._items: List[Tuple[Tuple, Hashable]] = []
+        self._positions: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._positions
+
+    def peek(self) -> Optional[Hashable]:
+        return self._items[0][1] if self._items else None
+
+    def push(self, key: Hashable, priority: Tuple) -> None:
+        position = self._positions.get(key)
+        if position is None:
+            self._items.append((priority, key))
+            self._positions[key] = len(self._items) - 1
+            self._sift_up(len(self._items) - 1)
+            return
+        
+        old_priority = self._items[position][0]
+        self._items[position] = (priority, key)
+        if priority < old_priority:
+            self._sift_up(position)
+        else:
+            self._sift_down(position)
+
+    def remove(self, key: Hashable) -> None:
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        
+        last = self._items.pop()
+        if position == len(self._items):
+            return
+        self._items[position] = last
+        self._positions[last[1]] = position
+        self._sift_up(position)
+        self._sift_down(self._positions[last[1]])
+
+    def _swap(self, i: int, j: int) -> None:
+        self._items[i], self._items[j] = self._items[j], self._items[i]
+        self._positions[self._items[i][1]] = i
+        self._positions[self._items[j][1]] = j
+
+    def _sift_up(self, position: int) -> None:
+        while position > 0:
+            parent = (position - 1) // 2
+            if self._items[position][0] >= self._items[parent][0]:
+                break
+            self._swap(position, parent)
+            position = parent
+
+    def _sift_down(self, position: int) -> None:
+        size = len(self._items)
+        while True:
+            smallest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < size and self._items[child][0] < self._items[smallest][0]:
+                    smallest = child
+            if smallest == position:
+                break
+            self._swap(position, smallest)
+            position = smallest
+
+
+class DistributionStrategy(ABC):
+    name = ""
+
+    @abstractmethod
+    async def select(
+        self,
+        source_id: int,
+        entries: List[RoutingEntry],
+        get_loads: LoadFetcher
+    ) -> Optional[int]:
+        ...
+
+    def on_load_change(self, operator_id: int, load: int) -> None:
+        pass
+
+    def reset(self, source_id: Optional[int] = None) -> None:
+        pass
+
+
+class WeightedRandomStrategy(DistributionStrategy):
+    name = "weighted_random"
+
+    async def select(self, source_id, entries, get_loads):
+        loads = await get_loads([entry.operator_id for entry in entries])
+        available = [
+            entry for entry in entries
+            if loads.get(entry.operator_id, 0) < entry.max_load
+        ]
+        picked = weighted_pick(available)
+        return picked.operator_id if picked else None
+
+
+class LeastUtilizationStrategy(DistributionStrategy):
+    name = "least_utilization"
+
+    def __init__(self):
+        self._heaps: Dict[int, IndexedHeap] = {}
+        self._entries: Dict[int, Dict[int, RoutingEntry]] = {}
+
+    async def select(self, source_id, entries, get_loads):
+        heap = self._heaps.get(source_id)
+        if heap is None:
+            loads = await get_loads([entry.operator_id for entry in entries])
+            heap = IndexedHeap()
+            for entry in entries:
+                load = loads.get(entry.operator_id, 0)
+                if load < entry.max_load:
+                    heap.push(entry.operator_id, utilization_priority(entry, load))
+            self._heaps[source_id] = heap
+            self._entries[source_id] = {entry.operator_id: entry for entry in entries}
+        
+        for _ in range(len(entries) + 1):
+            operator_id = heap.peek()
+            if operator_id is None:
+                break
+            loads = await get_loads([operator_id])
+            heap = self._heaps.get(source_id, heap)
+            self._update(source_id, operator_id, loads.get(operator_id, 0))
+            if heap.peek() == operator_id:
+                return operator_id
+        
+        if heap.peek() is None:
+            loads = await get_loads([entry.operator_id for entry in entries])
+            for entry in entries:
+                self._update(source_id, entry.operator_id, loads.get(entry.operator_id, 0))
+        return heap.peek()
+
+    def _update(self, source_id: int, operator_id: int, load: int) -> None:
+        heap = self._heaps.get(source_id)
+        entry = self._entries.get(source_id, {}).get(operator_id)
+        if heap is None or entry is None:
+            return
+        if load < entry.max_load:
+            heap.push(operator_id, utilization_priority(entry, load))
+        else:
+            heap.remove(operator_id)
+
+    def on_load_change(self, operator_id, load):
+        for source_id in self._heaps:
+            self._update(source_id, operator_id, load)
+
+    def reset(self, source_id=None):
+        if source_id is None:
+            self._heaps.clear()
+            self._entries.clear()
+        else:
+            self._heaps.pop(source_id, None)
+            self._entries.pop(source_id, None)
+
+
+class PowerOfTwoChoicesStrategy(DistributionStrategy):
+    name = "power_of_two"
+
+    async def select(self, source_id, entries, get_loads):
+        first = weighted_pick(entries)
+        if first is None:
+            return None
+        second = weighted_pick([entry for entry in entries if entry is not first])
+        candidates = [first] if second is None else [first, second]
+        
+        loads = await get_loads([entry.operator_id for entry in candidates])
+        available = [
+            entry for entry in candidates
+            if loads.get(entry.operator_id, 0) < entry.max_load
+        ]
+        if not available:
+            return await STRATEGIES[WeightedRandomStrategy.name].select(source_id, entries, get_loads)
+        
+        best = min(available, key=lambda entry: utilization_priority(entry, loads.get(entry.operator_id, 0)))
+        return best.operator_id
+
+
+DEFAULT_STRATEGY = WeightedRandomStrategy.name
+
+STRATEGIES: Dict[str, DistributionStrategy] = {
+    strategy.name: strategy
+    for strategy in (
+        WeightedRandomStrategy(),
+        LeastUtilizationStrategy(),
+        PowerOfTwoChoicesStrategy(),
+    )
+}
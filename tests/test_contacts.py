@@ -0,0 +1,171 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import StaticPool
+
+import distribution
+import models
+from admission import admission
+from database import Base, get_db
+from idempotency import contact_responses
+from main import app
+
+
+MAX_STATEMENTS_COLD = 7
+MAX_STATEMENTS_WARM = 5
+MAX_STATEMENTS_WARM_WITH_KEY = 7
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    distribution.invalidate_routing()
+    distribution._pending_loads.clear()
+    contact_responses.clear()
+    admission.buckets.clear()
+    yield
+    app.dependency_overrides.clear()
+    distribution.invalidate_routing()
+
+
+async def start(url, **engine_options):
+    engine = create_async_engine(url, **engine_options)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    return engine, client
+
+
+async def create_source_with_operator(client, max_load=10):
+    source_id = (await client.post("/sources/", json={"name": "bot"})).json()["id"]
+    operator_id = (await client.post("/operators/", json={"name": "op", "max_load": max_load})).json()["id"]
+    await client.put(
+        f"/sources/{source_id}/operators",
+        json={"operators": [{"operator_id": operator_id, "weight": 1}]}
+    )
+    return source_id, operator_id
+
+
+def test_intake_statement_count_is_bounded():
+    async def scenario():
+        engine, client = await start("sqlite+aiosqlite://", poolclass=StaticPool)
+        statements = []
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement)
+        )
+        source_id, _ = await create_source_with_operator(client)
+
+        async def count(body, headers=None):
+            statements.clear()
+            response = await client.post("/contacts/", json=body, headers=headers or {})
+            assert response.status_code == 201
+            return len(statements), response.json()
+
+        distribution.invalidate_routing()
+        cold, _ = await count({"source_id": source_id, "lead_phone": "+70000000001"})
+        assert cold <= MAX_STATEMENTS_COLD
+
+        warm_new_lead, _ = await count({"source_id": source_id, "lead_phone": "+70000000002"})
+        assert warm_new_lead <= MAX_STATEMENTS_WARM
+
+        warm_existing_lead, _ = await count({"source_id": source_id, "lead_phone": "+70000000002"})
+        assert warm_existing_lead <= MAX_STATEMENTS_WARM
+
+        body = {"source_id": source_id, "lead_phone": "+70000000003"}
+        headers = {"Idempotency-Key": "retry-1"}
+        with_key, original = await count(body, headers)
+        assert with_key <= MAX_STATEMENTS_WARM_WITH_KEY
+
+        replay, replayed = await count(body, headers)
+        assert replay == 0
+        assert replayed == original
+
+        await client.aclose()
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("strategy", ["weighted_random", "least_utilization", "power_of_two"])
+def test_concurrent_intake_respects_max_load(tmp_path, strategy):
+    async def scenario():
+        engine, client = await start(f"sqlite+aiosqlite:///{tmp_path / 'crm.db'}")
+        source_id, operator_id = await create_source_with_operator(client, max_load=3)
+        await client.patch(f"/sources/{source_id}", json={"distribution_strategy": strategy})
+
+        responses = await asyncio.gather(*[
+            client.post("/contacts/", json={"source_id": source_id, "lead_phone": f"+7900000{i:04d}"})
+            for i in range(20)
+        ])
+        assert all(response.status_code == 201 for response in responses)
+        assigned = [response.json()["operator_id"] for response in responses]
+        assert assigned.count(operator_id) == 3
+        assert distribution._pending_loads == {}
+
+        await client.aclose()
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_retries_with_same_key_replay_one_contact(tmp_path):
+    async def scenario():
+        engine, client = await start(f"sqlite+aiosqlite:///{tmp_path / 'crm.db'}")
+        source_id, operator_id = await create_source_with_operator(client, max_load=3)
+
+        body = {"source_id": source_id, "lead_phone": "+70000000001"}
+        responses = await asyncio.gather(*[
+            client.post("/contacts/", json=body, headers={"Idempotency-Key": "retry-1"})
+            for _ in range(5)
+        ])
+        assert [response.status_code for response in responses] == [201] * 5
+        assert len({response.json()["id"] for response in responses}) == 1
+        assert distribution._pending_loads == {}
+
+        response = await client.post("/contacts/", json={"source_id": source_id, "lead_phone": "+70000000002"})
+        assert response.json()["operator_id"] == operator_id
+
+        await client.aclose()
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_lead_contacts_reject_unknown_cursor():
+    async def scenario():
+        engine, client = await start("sqlite+aiosqlite://", poolclass=StaticPool)
+        source_id, _ = await create_source_with_operator(client)
+
+        first = (await client.post("/contacts/", json={"source_id": source_id, "lead_phone": "+70000000001"})).json()
+        second = (await client.post("/contacts/", json={"source_id": source_id, "lead_phone": "+70000000001"})).json()
+        other = (await client.post("/contacts/", json={"source_id": source_id, "lead_phone": "+70000000002"})).json()
+        lead_id = first["lead_id"]
+
+        page = (await client.get(f"/leads/{lead_id}/contacts", params={"limit": 1})).json()
+        assert [item["id"] for item in page["items"]] == [second["id"]]
+        page = (await client.get(
+            f"/leads/{lead_id}/contacts",
+            params={"limit": 1, "before_id": page["next_before_id"]}
+        )).json()
+        assert [item["id"] for item in page["items"]] == [first["id"]]
+        assert page["next_before_id"] is None
+
+        for before_id in (other["id"], 9999):
+            response = await client.get(f"/leads/{lead_id}/contacts", params={"before_id": before_id})
+            assert response.status_code == 400
+
+        await client.aclose()
+        await engine.dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,85 @@
+import asyncio
+import sqlite3
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import database
+import models
+
+
+BASELINE_SCHEMA = [
+    "CREATE TABLE operators ("
+    "id INTEGER NOT NULL, name VARCHAR NOT NULL, is_active BOOLEAN NOT NULL, "
+    "max_load INTEGER NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (id))",
+    "CREATE TABLE sources ("
+    "id INTEGER NOT NULL, name VARCHAR NOT NULL, description VARCHAR, "
+    "created_at DATETIME DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_sources_name ON sources (name)",
+    "CREATE TABLE leads ("
+    "id INTEGER NOT NULL, external_id VARCHAR, phone VARCHAR, email VARCHAR, name VARCHAR, "
+    "created_at DATETIME DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (id))",
+    "CREATE UNIQUE INDEX ix_leads_external_id ON leads (external_id)",
+    "CREATE TABLE source_operator_weights ("
+    "id INTEGER NOT NULL, source_id INTEGER NOT NULL, operator_id INTEGER NOT NULL, "
+    "weight FLOAT NOT NULL, PRIMARY KEY (id), "
+    "CONSTRAINT uq_source_operator UNIQUE (source_id, operator_id), "
+    "FOREIGN KEY(source_id) REFERENCES sources (id), "
+    "FOREIGN KEY(operator_id) REFERENCES operators (id))",
+    "CREATE TABLE contacts ("
+    "id INTEGER NOT NULL, lead_id INTEGER NOT NULL, source_id INTEGER NOT NULL, "
+    "operator_id INTEGER, status VARCHAR NOT NULL, message VARCHAR, "
+    "created_at DATETIME DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (id), "
+    "FOREIGN KEY(lead_id) REFERENCES leads (id), "
+    "FOREIGN KEY(source_id) REFERENCES sources (id), "
+    "FOREIGN KEY(operator_id) REFERENCES operators (id))",
+    "INSERT INTO sources (id, name) VALUES (1, 'bot')",
+    "INSERT INTO leads (id, phone, name) VALUES (1, '+70000000001', 'Иван Петров')",
+    "INSERT INTO contacts (id, lead_id, source_id, status, message) "
+    "VALUES (1, 1, 1, 'active', 'перезвоните после обеда')",
+]
+
+
+def columns(db, table):
+    return {row[1] for row in db.execute(f"PRAGMA table_info({table})")}
+
+
+def upgrade(path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    monkeypatch.setattr(database, "engine", engine)
+
+    async def run():
+        await database.init_db()
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_baseline_database_upgrades_to_current_schema(tmp_path, monkeypatch):
+    path = tmp_path / "crm.db"
+    with sqlite3.connect(path) as db:
+        for statement in BASELINE_SCHEMA:
+            db.execute(statement)
+
+    upgrade(path, monkeypatch)
+
+    with sqlite3.connect(path) as db:
+        assert db.execute("PRAGMA user_version").fetchone()[0] == database.SCHEMA_VERSION
+        assert {"rate_limit", "rate_burst", "distribution_strategy"} <= columns(db, "sources")
+        assert "request_hash" in columns(db, "idempotency_keys")
+        assert db.execute("SELECT distribution_strategy FROM sources").fetchone()[0] == "weighted_random"
+        assert db.execute("SELECT rowid FROM leads_fts WHERE leads_fts MATCH 'Петров'").fetchall() == [(1,)]
+        assert db.execute("SELECT rowid FROM contacts_fts WHERE contacts_fts MATCH 'обеда'").fetchall() == [(1,)]
+
+
+def test_every_migration_is_safe_on_current_schema(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'crm.db'}")
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(database.Base.metadata.create_all)
+            for version in sorted(database.MIGRATIONS):
+                for statement in database.MIGRATIONS[version]:
+                    await database.apply_migration(conn, statement)
+        await engine.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,128 @@
+import asyncio
+import random
+
+import pytest
+
+from strategies import (
+    IndexedHeap,
+    RoutingEntry,
+    WeightedRandomStrategy,
+    LeastUtilizationStrategy,
+    PowerOfTwoChoicesStrategy,
+)
+
+
+STRATEGY_CLASSES = [WeightedRandomStrategy, LeastUtilizationStrategy, PowerOfTwoChoicesStrategy]
+
+
+def simulate(strategy, entries, arrivals, departure_probability=0.0, seed=1):
+    random.seed(seed)
+    loads = {entry.operator_id: 0 for entry in entries}
+    limits = {entry.operator_id: entry.max_load for entry in entries}
+    unassigned = 0
+
+    async def get_loads(operator_ids):
+        return {operator_id: loads[operator_id] for operator_id in operator_ids}
+
+    async def run():
+        nonlocal unassigned
+        for _ in range(arrivals):
+            operator_id = await strategy.select(1, entries, get_loads)
+            if operator_id is None:
+                unassigned += 1
+            else:
+                loads[operator_id] += 1
+                assert loads[operator_id] <= limits[operator_id]
+                strategy.on_load_change(operator_id, loads[operator_id])
+            
+            busy = [operator_id for operator_id, load in loads.items() if load]
+            if busy and random.random() < departure_probability:
+                operator_id = random.choice(busy)
+                loads[operator_id] -= 1
+                strategy.on_load_change(operator_id, loads[operator_id])
+
+    asyncio.run(run())
+    return loads, unassigned
+
+
+@pytest.mark.parametrize("strategy_class", STRATEGY_CLASSES)
+def test_spread_is_proportional_to_weights(strategy_class):
+    entries = [
+        RoutingEntry(1, 1.0, True, 100000),
+        RoutingEntry(2, 2.0, True, 100000),
+        RoutingEntry(3, 5.0, True, 100000),
+    ]
+    loads, unassigned = simulate(strategy_class(), entries, arrivals=8000)
+    
+    assert unassigned == 0
+    total_weight = sum(entry.weight for entry in entries)
+    for entry in entries:
+        share = loads[entry.operator_id] / 8000
+        assert share == pytest.approx(entry.weight / total_weight, abs=0.03)
+
+
+@pytest.mark.parametrize("strategy_class", STRATEGY_CLASSES)
+def test_max_load_is_never_exceeded(strategy_class):
+    entries = [
+        RoutingEntry(1, 1.0, True, 3),
+        RoutingEntry(2, 10.0, True, 2),
+        RoutingEntry(3, 5.0, True, 5),
+    ]
+    loads, unassigned = simulate(strategy_class(), entries, arrivals=2000, departure_probability=0.5)
+    
+    assert all(loads[entry.operator_id] <= entry.max_load for entry in entries)
+    assert unassigned > 0
+
+
+@pytest.mark.parametrize("strategy_class", STRATEGY_CLASSES)
+def test_no_operator_when_all_full(strategy_class):
+    entries = [RoutingEntry(1, 1.0, True, 1), RoutingEntry(2, 3.0, True, 2)]
+    loads, unassigned = simulate(strategy_class(), entries, arrivals=10)
+    
+    assert loads == {1: 1, 2: 2}
+    assert unassigned == 7
+
+
+def test_least_utilization_keeps_weighted_load_even():
+    entries = [RoutingEntry(operator_id, float(operator_id % 4 + 1), True, 10000) for operator_id in range(1, 51)]
+    loads, _ = simulate(LeastUtilizationStrategy(), entries, arrivals=5000, departure_probability=0.5)
+    
+    weighted = [loads[entry.operator_id] / entry.weight for entry in entries]
+    assert max(weighted) - min(weighted) <= 1.0
+
+
+def test_indexed_heap_matches_reference():
+    random.seed(7)
+    heap = IndexedHeap()
+    reference = {}
+    for _ in range(5000):
+        key = random.randrange(30)
+        if random.random() < 0.6:
+            priority = (random.random(), key)
+            heap.push(key, priority)
+            reference[key] = priority
+        else:
+            heap.remove(key)
+            reference.pop(key, None)
+        assert len(heap) == len(reference)
+        assert heap.peek() == (min(reference, key=reference.get) if reference else None)
+
+
+def test_least_utilization_rechecks_loads_changed_elsewhere():
+    strategy = LeastUtilizationStrategy()
+    entries = [RoutingEntry(1, 1.0, True, 2), RoutingEntry(2, 1.0, True, 2)]
+    loads = {1: 0, 2: 1}
+
+    async def get_loads(operator_ids):
+        return {operator_id: loads[operator_id] for operator_id in operator_ids}
+
+    async def run():
+        assert await strategy.select(1, entries, get_loads) == 1
+        loads[1] = 2
+        assert await strategy.select(1, entries, get_loads) == 2
+        loads[2] = 2
+        assert await strategy.select(1, entries, get_loads) is None
+        loads[1] = 0
+        assert await strategy.select(1, entries, get_loads) == 1
+
+    asyncio.run(run())